@@ -1,5 +1,6 @@
 def intersect_unsorted(values, potential_values):
-    """Return an unsorted intersection of two lists"""
+    """Return an unsorted intersection of two lists (keeps the order of values)"""
+    potential_values = set(potential_values)  # hash lookup instead of a linear scan
     return [val for val in values if val in potential_values]
 
 
@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
 
+from ..._global_utils import intersect_unsorted
+
 
 def check_variables(variables):
     # treating variables as list simplifies code
@@ -27,10 +29,11 @@ def prepare_numerical_categorical(all_profiles, variables, variable_type):
     all_variables = all_profiles['_vname_'].dropna().unique()  # variables do not need to be string
 
     if variables is not None:
-        all_variables_intersect = set(all_variables).intersection(set(variables))
+        # keep the order of appearance, which is used for the _vname_ categories
+        all_variables_intersect = intersect_unsorted(all_variables, variables)
         if len(all_variables_intersect) == 0:
             raise ValueError("variables do not overlap with " + all_variables)
-        all_variables = np.array(list(all_variables_intersect))
+        all_variables = np.array(all_variables_intersect)
 
     # only numerical or only factors?
     is_numeric = np.empty_like(all_variables, bool)
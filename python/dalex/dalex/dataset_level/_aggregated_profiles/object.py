@@ -1,10 +1,23 @@
 import plotly.express as px
-from copy import deepcopy
 
 from .checks import *
-from .utils import aggregate_profiles
+from .plot import get_raw_profiles_traces
+from .utils import aggregate_profiles, get_profiles_hash, get_unique_values, select_variables
 from ... import _theme, _global_checks, _global_utils
 
+# axes layout does not depend on the data, so it is created once
+_XAXIS_NUMERICAL = {'matches': None, 'showticklabels': True,
+                    'type': 'linear', 'gridwidth': 2, 'zeroline': False, 'automargin': True,
+                    'ticks': "outside", 'tickcolor': 'white', 'ticklen': 3, 'fixedrange': True}
+_XAXIS_CATEGORICAL = {'matches': None, 'showticklabels': True,
+                      'type': 'category', 'gridwidth': 2, 'automargin': True,  # autorange="reversed"
+                      'ticks': "outside", 'tickcolor': 'white', 'ticklen': 10, 'fixedrange': True}
+_YAXIS = {'type': 'linear', 'gridwidth': 2, 'zeroline': False, 'automargin': True,
+          'ticks': 'outside', 'tickcolor': 'white', 'ticklen': 3, 'fixedrange': True}
+
+# maximum number of facets layouts for which the raw profiles traces are kept
+_RAW_TRACES_CACHE_SIZE = 4
+
 
 class AggregatedProfiles:
     """Calculate dataset level variable profiles as Partial or Accumulated Dependence
@@ -41,8 +54,8 @@ class AggregatedProfiles:
         Main result attribute of an explanation.
     mean_prediction : float
         Average prediction for sampled `data` (using `N`).
-    raw_profiles : pd.DataFrame or None
-        Saved CeterisParibus object.
+    raw_profiles : CeterisParibus or None
+        Saved CeterisParibus object (a reference, not a copy).
         NOTE: None if more objects were passed to the `fit` method.
     type : {'partial', 'accumulated', 'conditional'}
         Type of model profiles.
@@ -90,6 +103,7 @@ class AggregatedProfiles:
         self.mean_prediction = None
         self.raw_profiles = None
         self.random_state = random_state
+        self._raw_traces_cache = {}
 
     def _repr_html_(self):
         return self.result._repr_html_()
@@ -115,30 +129,48 @@ class AggregatedProfiles:
         # are there any other cp?
         from dalex.instance_level import CeterisParibus
         if isinstance(ceteris_paribus, CeterisParibus):  # allow for ceteris_paribus to be a single element
-            all_profiles = ceteris_paribus.result.copy()
-            all_observations = ceteris_paribus.new_observation.copy()
-            self.raw_profiles = deepcopy(ceteris_paribus)
+            # columns are only added or replaced before the rows are selected, so a shallow copy is enough
+            all_profiles = select_variables(ceteris_paribus.result, self.variables).copy(deep=False)
+            mean_prediction = ceteris_paribus.new_observation['_yhat_'].mean()
+            self.raw_profiles = ceteris_paribus
         elif isinstance(ceteris_paribus, (list, tuple)):  # ceteris_paribus as tuple or array
-            all_profiles = None
-            all_observations = None
+            profile_list = []
+            yhat_sum, yhat_count = 0, 0
             for cp in ceteris_paribus:
                 _global_checks.global_check_object_class(cp, CeterisParibus)
-                all_profiles = pd.concat([all_profiles, cp.result.copy()])
-                all_observations = pd.concat([all_observations, cp.new_observation.copy()])
+                profile_list.append(select_variables(cp.result, self.variables))
+                # mean of all observations is calculated without concatenating them
+                yhat_sum += cp.new_observation['_yhat_'].sum()
+                yhat_count += cp.new_observation['_yhat_'].count()
+            # concat once, as concatenating in the loop is quadratic
+            all_profiles = pd.concat(profile_list, ignore_index=True, copy=False)
+            mean_prediction = yhat_sum / yhat_count
         else:
             _global_checks.global_raise_objects_class(ceteris_paribus, CeterisParibus)
 
         all_profiles, vnames = prepare_numerical_categorical(all_profiles, self.variables, self.variable_type)
 
-        # select only suitable variables
-        all_profiles = all_profiles.loc[all_profiles['_vname_'].isin(vnames), :]
+        # single precision is enough for the averages and halves the memory traffic of groupby,
+        # other types of profiles are calculated with weights in double precision
+        if self.type == 'partial':
+            all_profiles['_yhat_'] = all_profiles['_yhat_'].astype(np.float32)
+
+        # encode _vname_ as categorical with suitable variables as categories,
+        # so that the rows are selected and grouped by integer codes instead of strings
+        all_profiles['_vname_'] = pd.Categorical(all_profiles['_vname_'], categories=vnames)
+
+        # select only suitable variables (other variables are coded as -1)
+        all_profiles = all_profiles.iloc[np.flatnonzero(all_profiles['_vname_'].cat.codes.to_numpy() != -1)]
 
         all_profiles = create_x(all_profiles, self.variable_type)
 
-        self.mean_prediction = all_observations['_yhat_'].mean()
+        self.mean_prediction = mean_prediction
 
         self.result = aggregate_profiles(all_profiles, self.mean_prediction, self.type, self.groups, self.center,
                                          self.span, verbose)
+        # keep the dtype of the result independent of the type of profiles
+        self.result['_yhat_'] = self.result['_yhat_'].astype(np.float64)
+        self._raw_traces_cache = {}
 
     def plot(self,
              objects=None,
@@ -205,20 +237,24 @@ class AggregatedProfiles:
 
         # are there any other objects to plot?
         if objects is None:
-            _result_df = self.result.assign(_mp_=self.mean_prediction if center else 0)
+            _objects = [self]
         elif isinstance(objects, self.__class__):  # allow for objects to be a single element
-            _result_df = pd.concat([self.result.assign(_mp_=self.mean_prediction if center else 0),
-                                    objects.result.assign(_mp_=objects.mean_prediction if center else 0)])
+            _objects = [self, objects]
         elif isinstance(objects, (list, tuple)):  # objects as tuple or array
-            _result_df = self.result.assign(_mp_=self.mean_prediction if center else 0)
+            _objects = [self]
             for ob in objects:
                 _global_checks.global_check_object_class(ob, self.__class__)
-                _result_df = pd.concat([_result_df, ob.result.assign(_mp_=ob.mean_prediction if center else 0)])
+                _objects.append(ob)
         else:
             _global_checks.global_raise_objects_class(objects, self.__class__)
 
+        # add _mp_ to the concatenated results at once instead of copying each result with assign()
+        _result_df = pd.concat([ob.result for ob in _objects], ignore_index=True, copy=False)
+        _result_df['_mp_'] = np.repeat([ob.mean_prediction if center else 0 for ob in _objects],
+                                       [ob.result.shape[0] for ob in _objects])
+
         # variables to use
-        all_variables = _result_df['_vname_'].dropna().unique().tolist()
+        all_variables = get_unique_values(_result_df['_vname_'])
 
         if variables is not None:
             all_variables = _global_utils.intersect_unsorted(variables, all_variables)
@@ -227,12 +263,35 @@ class AggregatedProfiles:
 
             _result_df = _result_df.loc[_result_df['_vname_'].isin(all_variables), :]
 
+        is_x_numeric = pd.api.types.is_numeric_dtype(_result_df['_x_'])
+
+        # raw profiles are plotted in the background of numerical profiles
+        is_raw_plotted = geom == 'profiles' and is_x_numeric and self.raw_profiles is not None
+        if is_raw_plotted:
+            _raw_df = self.raw_profiles.result
+            raw_variables = _global_utils.intersect_unsorted(all_variables, get_unique_values(_raw_df['_vname_']))
+            _raw_df = _raw_df.loc[_raw_df['_vname_'].isin(raw_variables), :]
+
+            # raw traces do not depend on the styling parameters, so they are created once per facets layout;
+            # raw_profiles belongs to the caller, so the key changes with its values
+            if getattr(self, '_raw_traces_cache', None) is None:  # objects pickled without the cache
+                self._raw_traces_cache = {}
+            raw_key = (get_profiles_hash(_raw_df, raw_variables + ['_vname_', '_label_', '_ids_', '_yhat_']),
+                       tuple(all_variables), facet_ncol)
+            raw_cached = raw_key in self._raw_traces_cache
+            if raw_cached:
+                raw_traces, raw_min, raw_max = self._raw_traces_cache[raw_key]
+            else:
+                raw_min, raw_max = _raw_df['_yhat_'].min(), _raw_df['_yhat_'].max()
+
         #  calculate y axis range to allow for fixedrange True
         dl = _result_df['_yhat_'].to_numpy()
-        min_max_margin = dl.ptp() * 0.10
-        min_max = [dl.min() - min_max_margin, dl.max() + min_max_margin]
+        dl_min, dl_max = dl.min(), dl.max()  # ptp() would traverse dl again
+        if is_raw_plotted:
+            dl_min, dl_max = min(dl_min, raw_min), max(dl_max, raw_max)
+        min_max_margin = (dl_max - dl_min) * 0.10
+        min_max = [dl_min - min_max_margin, dl_max + min_max_margin]
 
-        is_x_numeric = pd.api.types.is_numeric_dtype(_result_df['_x_'])
         n = len(all_variables)
 
         facet_nrow = int(np.ceil(n / facet_ncol))
@@ -242,10 +301,10 @@ class AggregatedProfiles:
         hovermode, render_mode = 'x unified', 'svg'
 
         color = '_label_'  # _groups_ doesnt make much sense for multiple AP objects
-        m = len(_result_df[color].dropna().unique())
+        m = len(get_unique_values(_result_df[color]))
 
         if is_x_numeric:
-            if geom == 'profiles' and self.raw_profiles is not None:
+            if is_raw_plotted:
                 render_mode = 'webgl'
 
             fig = px.line(_result_df,
@@ -260,26 +319,27 @@ class AggregatedProfiles:
                           facet_col_spacing=horizontal_spacing,
                           template="none",
                           render_mode=render_mode,
+                          custom_data=['_vname_'] if is_raw_plotted else None,
                           color_discrete_sequence=_theme.get_default_colors(m, 'line')) \
                     .update_traces(dict(line_width=size, opacity=alpha)) \
-                    .update_xaxes({'matches': None, 'showticklabels': True,
-                                   'type': 'linear', 'gridwidth': 2, 'zeroline': False, 'automargin': True,
-                                   'ticks': "outside", 'tickcolor': 'white', 'ticklen': 3, 'fixedrange': True}) \
-                    .update_yaxes({'type': 'linear', 'gridwidth': 2, 'zeroline': False, 'automargin': True,
-                                   'ticks': 'outside', 'tickcolor': 'white', 'ticklen': 3, 'fixedrange': True,
-                                   'range': min_max})
-
-            if geom == 'profiles' and self.raw_profiles is not None:
+                    .update_xaxes(_XAXIS_NUMERICAL) \
+                    .update_yaxes(_YAXIS, range=min_max)
+
+            if is_raw_plotted:
                 fig.update_traces(dict(line_width=2*size, opacity=1))
-                fig_cp = self.raw_profiles.plot(variables=list(all_variables),
-                                                facet_ncol=facet_ncol,
-                                                show_observations=False, show=False) \
-                    .update_traces(dict(line_width=1, opacity=0.5, line_color='#ceced9'))
 
-                for _, value in enumerate(fig.data):
-                    fig_cp.add_trace(value)
+                if not raw_cached:
+                    # facets of the variables are identified by _vname_ in customdata
+                    axes = {trace.customdata[0][0]: (trace.xaxis, trace.yaxis) for trace in fig.data}
+                    raw_traces = get_raw_profiles_traces(_raw_df, raw_variables, axes)
+                    if len(self._raw_traces_cache) >= _RAW_TRACES_CACHE_SIZE:
+                        del self._raw_traces_cache[next(iter(self._raw_traces_cache))]  # the oldest one
+                    self._raw_traces_cache[raw_key] = (raw_traces, raw_min, raw_max)
+
+                # add copies of all traces at once and keep the aggregated profiles on top
+                fig.add_traces(raw_traces)
+                fig.data = fig.data[-len(raw_traces):] + fig.data[:-len(raw_traces)]
                 hovermode = False
-                fig = fig_cp
         else:
             _result_df = _result_df.assign(_diff_=lambda x: x['_yhat_'] - x['_mp_'])
             mp_format = ':.3f'
@@ -301,12 +361,8 @@ class AggregatedProfiles:
                          template="none",
                          color_discrete_sequence=_theme.get_default_colors(m, 'line'),  # bar was forgotten
                          barmode='group')  \
-                    .update_xaxes({'matches': None, 'showticklabels': True,
-                                   'type': 'category', 'gridwidth': 2, 'automargin': True,  # autorange="reversed"
-                                   'ticks': "outside", 'tickcolor': 'white', 'ticklen': 10, 'fixedrange': True}) \
-                    .update_yaxes({'type': 'linear', 'gridwidth': 2, 'zeroline': False, 'automargin': True,
-                                   'ticks': 'outside', 'tickcolor': 'white', 'ticklen': 3, 'fixedrange': True,
-                                   'range': min_max})
+                    .update_xaxes(_XAXIS_CATEGORICAL) \
+                    .update_yaxes(_YAXIS, range=min_max)
 
             # add hline https://github.com/plotly/plotly.py/issues/2141
             for i, bar in enumerate(fig.data):
@@ -0,0 +1,23 @@
+import plotly.graph_objects as go
+
+
+def get_raw_profiles_traces(raw_profiles, variables, axes):
+    """Create the traces of raw Ceteris Paribus profiles plotted in the background
+
+    :param raw_profiles: pd.DataFrame, result of the CeterisParibus object
+    :param variables: list of str, names of the plotted variables
+    :param axes: dict, maps variable name to its facet (xaxis, yaxis) names
+    :return: list of go.Scattergl, one line per variable, label and observation
+    """
+    traces = []
+    for variable in variables:
+        profiles = raw_profiles.loc[raw_profiles['_vname_'] == variable, [variable, '_yhat_', '_label_', '_ids_']]
+        x = profiles[variable].to_numpy()
+        y = profiles['_yhat_'].to_numpy()
+        xaxis, yaxis = axes[variable]
+
+        for rows in profiles.groupby(['_label_', '_ids_'], sort=False).indices.values():
+            traces.append(go.Scattergl(x=x[rows], y=y[rows], xaxis=xaxis, yaxis=yaxis,
+                                       mode='lines', line={'width': 1, 'color': '#ceced9'}, opacity=0.5,
+                                       hoverinfo='skip', showlegend=False))
+    return traces
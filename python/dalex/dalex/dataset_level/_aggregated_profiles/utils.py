@@ -1,3 +1,5 @@
+import hashlib
+
 import numpy as np
 import pandas as pd
 from tqdm import tqdm
@@ -6,7 +8,8 @@ from tqdm import tqdm
 def aggregate_profiles(all_profiles, mean_prediction, type, groups, center, span, verbose=True):
     if type == 'partial':
         aggregated_profiles = \
-            all_profiles.groupby(['_vname_', '_label_', '_x_'] + groups, sort=False)['_yhat_'].mean().reset_index()
+            all_profiles.groupby(['_vname_', '_label_', '_x_'] + groups,
+                                 observed=True, sort=False, as_index=False)['_yhat_'].mean()
 
     else:
         # split all_profiles into groups
@@ -15,7 +18,7 @@ def aggregate_profiles(all_profiles, mean_prediction, type, groups, center, span
         aggregated_profiles = \
             all_profiles. \
                 loc[:, ["_vname_", "_label_", "_x_", "_yhat_", "_ids_", "_original_"] + groups]. \
-                groupby(['_vname_', '_label_']). \
+                groupby(['_vname_', '_label_'], observed=True, sort=False). \
                 progress_apply(lambda split_profile: split_over_variables_and_labels(split_profile.copy(deep=True),
                                                                                      type, groups, span)). \
                 reset_index(level=[0, 1])  # remove level_2
@@ -30,16 +33,38 @@ def aggregate_profiles(all_profiles, mean_prediction, type, groups, center, span
 
     # postprocessing
     if len(groups) != 0:
-        aggregated_profiles['_groups_'] = aggregated_profiles.loc[:, groups].apply(
-            lambda row: '_'.join(row.astype(str)), axis=1)
+        # join the columns at once instead of row by row
+        aggregated_profiles['_groups_'] = aggregated_profiles[groups[0]].astype(str).str.cat(
+            [aggregated_profiles[group].astype(str) for group in groups[1:]], sep='_')
         aggregated_profiles.drop(columns=groups, inplace=True)
 
-        aggregated_profiles.loc[:, '_label_'] = \
-            aggregated_profiles.loc[:, ['_label_', '_groups_']].apply(lambda row: '_'.join(row), axis=1)
+        aggregated_profiles['_label_'] = \
+            aggregated_profiles['_label_'].astype(str).str.cat(aggregated_profiles['_groups_'], sep='_')
 
     return aggregated_profiles
 
 
+def select_variables(profiles, variables):
+    # drop rows of other variables before concatenation, so that they are never copied
+    if variables is None:
+        return profiles
+    return profiles.loc[profiles['_vname_'].isin(variables), :]
+
+
+def get_unique_values(column):
+    # unique values of a categorical column are found over its integer codes,
+    # unused categories (e.g. after selecting rows of the result) are omitted
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.remove_unused_categories().cat.categories.tolist()
+    return column.dropna().unique().tolist()
+
+
+def get_profiles_hash(profiles, columns):
+    # hash of the values (not of the object), so that the changes made in place are noticed
+    row_hashes = pd.util.hash_pandas_object(profiles[columns], index=False).to_numpy()
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+
 def split_over_variables_and_labels(split_profile, type, groups, span):
     """
     Inner function that calculates actual conditional profiles for one variable only. Iterated over each variable and group.
@@ -74,26 +99,32 @@ def split_over_variables_and_labels(split_profile, type, groups, span):
 
     if type == 'accumulated':
         # diffs
-        split_profile['_yhat_'] = split_profile. \
-            groupby('_ids_')['_yhat_']. \
-            transform(lambda column: column.diff())
+        split_profile['_yhat_'] = split_profile.groupby('_ids_', sort=False)['_yhat_'].diff()
 
         # diff causes NaNs at the beginning of each group
-        split_profile.loc[np.isnan(split_profile['_yhat_']), '_yhat_'] = 0
+        split_profile['_yhat_'] = split_profile['_yhat_'].fillna(0)
+
+    # weighted average in each point, calculated with weighted bincounts over the group codes
+    grouped = split_profile.groupby(['_x_'] + groups, observed=True, sort=False)
+    codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    is_grouped = codes >= 0  # groupby drops missing keys
+    par_profile = grouped.size().index.to_frame(index=False)
 
-    par_profile = split_profile.groupby(['_x_'] + groups, sort=False). \
-        apply(lambda point: (point['_yhat_'] * point['_w_']).sum() / point['_w_'].sum() \
-        if point['_w_'].sum() != 0 else 0)
+    # missing values are skipped, like in pd.Series.sum
+    w = split_profile['_w_'].to_numpy(dtype=float, na_value=np.nan)[is_grouped]
+    w[np.isnan(w)] = 0
+    wy = w * split_profile['_yhat_'].to_numpy(dtype=float, na_value=np.nan)[is_grouped]
+    wy[np.isnan(wy)] = 0
 
-    par_profile.name = '_yhat_'
-    par_profile = par_profile.reset_index()
+    w_sum = np.bincount(codes[is_grouped], weights=w, minlength=par_profile.shape[0])
+    wy_sum = np.bincount(codes[is_grouped], weights=wy, minlength=par_profile.shape[0])
+    par_profile['_yhat_'] = np.divide(wy_sum, w_sum, out=np.zeros_like(wy_sum), where=w_sum != 0)
 
     if type == 'accumulated':
         if len(groups) == 0:
             par_profile['_yhat_'] = par_profile['_yhat_'].cumsum()
         else:
-            par_profile['_yhat_'] = par_profile.groupby(groups, sort=False)['_yhat_'].transform(
-                lambda column: column.cumsum())
+            par_profile['_yhat_'] = par_profile.groupby(groups, sort=False)['_yhat_'].cumsum()
 
     return par_profile
 
@@ -210,7 +210,7 @@ class CeterisParibus:
         else:
             _global_checks.global_raise_objects_class(objects, self.__class__)
 
-        if _include is False and show_observations:
+        if not _include and show_observations:
                 warnings.warn("show_observations will be set to False,"
                               "because the variable_splits_with_obs attribute is False"
                               "See `variable_splits_with_obs` parameter in `predict_profile`.")
@@ -255,8 +255,9 @@ class CeterisParibus:
 
         #  calculate y axis range to allow for fixedrange True
         dl = _result_df['_yhat_'].to_numpy()
-        min_max_margin = dl.ptp() * 0.10
-        min_max = [dl.min() - min_max_margin, dl.max() + min_max_margin]
+        dl_min, dl_max = dl.min(), dl.max()  # ptp() would traverse dl again
+        min_max_margin = (dl_max - dl_min) * 0.10
+        min_max = [dl_min - min_max_margin, dl_max + min_max_margin]
 
         # create _x_
         if len(variable_names) == 1:
@@ -83,6 +83,84 @@ class AggregatedProfilesTestTitanic(unittest.TestCase):
     def test_conditional(self):
         self.helper_test('conditional')
 
+    def test_fit_list(self):
+        cp1 = self.exp.predict_profile(self.X.iloc[:10], verbose=False)
+        cp2 = self.exp.predict_profile(self.X.iloc[10:25], verbose=False)
+
+        case1 = dx.dataset_level.AggregatedProfiles()
+        case1.fit([cp1, cp2], verbose=False)
+        case2 = dx.dataset_level.AggregatedProfiles()
+        case2.fit((cp1,), verbose=False)
+
+        self.assertIsInstance(case1.result, pd.DataFrame)
+        self.assertIsInstance(case2.result, pd.DataFrame)
+        self.assertAlmostEqual(case1.mean_prediction,
+                               pd.concat([cp1.new_observation, cp2.new_observation])['_yhat_'].mean())
+        self.assertNotIn('_x_', cp1.result.columns)
+
+        cp1_result = cp1.result.copy()
+        case3 = dx.dataset_level.AggregatedProfiles()
+        case3.fit(cp1, verbose=False)
+        pd.testing.assert_frame_equal(cp1.result, cp1_result)
+
+        with self.assertRaises(TypeError):
+            case1.fit([cp1, case2], verbose=False)
+
+    def test_missing_values(self):
+        X = self.X.iloc[:20].copy()
+        X.loc[X.index[:5], 'age'] = np.nan
+        cp = self.exp.predict_profile(X, verbose=False)
+
+        for test_type in ('accumulated', 'conditional'):
+            case1 = dx.dataset_level.AggregatedProfiles(type=test_type)
+            case1.fit(cp, verbose=False)
+
+            self.assertIsInstance(case1.result, pd.DataFrame)
+            self.assertFalse(case1.result['_yhat_'].isna().any())
+
+    def test_plot_cache(self):
+        case1 = self.exp.model_profile(N=50, verbose=False)
+
+        fig1 = case1.plot(show=False)
+        case1.result['_label_'] = 'renamed'
+        fig2 = case1.plot(show=False)
+
+        self.assertIsInstance(fig2, Figure)
+        self.assertEqual(fig1.data[0].name, 'model1')
+        self.assertEqual(fig2.data[0].name, 'renamed')
+
+        fig3 = case1.plot(geom='profiles', variables=['age', 'fare'], show=False)
+        fig4 = case1.plot(geom='profiles', variables=['age', 'fare'], size=3, alpha=0.5, show=False)
+        self.assertEqual(len(case1._raw_traces_cache), 1)
+        self.assertEqual(len(fig3.data), len(fig4.data))
+        np.testing.assert_array_equal(fig3.data[0].x, fig4.data[0].x)
+        self.assertEqual(fig3.data[0].line, fig4.data[0].line)
+        self.assertEqual(fig3.layout.yaxis.range, fig4.layout.yaxis.range)
+
+        case1.raw_profiles.result['_yhat_'] += 1
+        fig5 = case1.plot(geom='profiles', variables=['age', 'fare'], show=False)
+        self.assertEqual(len(case1._raw_traces_cache), 2)
+        np.testing.assert_allclose(fig5.data[0].y, fig3.data[0].y + 1)
+        self.assertGreater(fig5.layout.yaxis.range[1], fig3.layout.yaxis.range[1])
+
+        for ncol in range(1, 6):
+            case1.plot(geom='profiles', facet_ncol=ncol, show=False)
+        self.assertLessEqual(len(case1._raw_traces_cache), 4)
+
+        del case1._raw_traces_cache  # as in objects pickled before the cache was added
+        self.assertIsInstance(case1.plot(geom='profiles', show=False), Figure)
+
+        case1.fit(self.exp.predict_profile(self.X.iloc[:10], verbose=False), verbose=False)
+        self.assertDictEqual(case1._raw_traces_cache, {})
+
+    def test_plot_selected_rows(self):
+        case1 = self.exp.model_profile(N=50, verbose=False)
+        case1.result = case1.result.loc[case1.result['_vname_'] == 'age', :]
+
+        fig1 = case1.plot(show=False)
+        self.assertEqual(len(fig1.data), 1)
+        self.assertListEqual([annotation.text for annotation in fig1.layout.annotations], ['age', 'prediction'])
+
     def helper_test(self, test_type):
         case1 = self.exp.model_profile(test_type, verbose=False)
         case2 = self.exp.model_profile(test_type, 100, variables=['age', 'fare'], verbose=False)
@@ -128,6 +206,8 @@ class AggregatedProfilesTestTitanic(unittest.TestCase):
         fig7 = case10.plot(show=False)
         fig8 = case11.plot(case12, show=False)
         fig9 = case13.plot((case1, case_3_models), show=False)
+        fig10 = case2.plot(geom='profiles', show=False)
+        fig11 = case8.plot(case9, geom='profiles', size=1, show=False)
 
         self.assertIsInstance(fig1, Figure)
         self.assertIsInstance(fig2, Figure)
@@ -138,6 +218,9 @@ class AggregatedProfilesTestTitanic(unittest.TestCase):
         self.assertIsInstance(fig7, Figure)
         self.assertIsInstance(fig8, Figure)
         self.assertIsInstance(fig9, Figure)
+        self.assertIsInstance(fig10, Figure)
+        self.assertIsInstance(fig11, Figure)
+        self.assertEqual(len(fig10.data), len(case2.raw_profiles.result.groupby(['_vname_', '_ids_'])) + 2)
 
 
 if __name__ == '__main__':
@@ -199,6 +199,11 @@ class CeterisParibusTestTitanic(unittest.TestCase):
         self.assertIsInstance(fig7, Figure)
         self.assertIsInstance(fig8, Figure)
 
+        case4 = self.exp.predict_profile(self.X.iloc[3, :], variable_splits_with_obs=False, verbose=False)
+        with self.assertWarns(UserWarning):
+            fig9 = case1.plot((case3, case4), show=False)
+        self.assertIsInstance(fig9, Figure)
+
 
 if __name__ == '__main__':
     unittest.main()